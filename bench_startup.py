@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""启动性能基准：统计 time-to-prompt，并用 -X importtime 列出最慢的导入。
+
+用法：
+    python bench_startup.py                 # 默认 10 次，目标 100ms
+    python bench_startup.py -n 20 --target 150
+
+time-to-prompt 的中位数超过目标时以退出码 1 结束，可直接用于 CI。
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+PROMPT_MARKER = "▶".encode()
+
+
+def measure_time_to_prompt():
+    """启动交互模式，返回从 spawn 到输入提示符出现的耗时（毫秒）。"""
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "index.py")],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        cwd=ROOT,
+    )
+    output = b""
+    try:
+        while PROMPT_MARKER not in output:
+            chunk = os.read(proc.stdout.fileno(), 4096)
+            if not chunk:
+                raise RuntimeError("process exited before showing the prompt")
+            output += chunk
+        return (time.perf_counter() - started) * 1000
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def slowest_imports(top):
+    """用 -X importtime 导入 lib.agent，返回累计耗时最多的 top 个模块。"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import lib.agent"],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _self, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="oh-my-code 启动性能基准")
+    parser.add_argument("-n", "--runs", type=int, default=10, help="测量次数")
+    parser.add_argument("--target", type=float, default=100, help="time-to-prompt 目标（毫秒）")
+    parser.add_argument("--top", type=int, default=10, help="列出最慢的导入数量")
+    args = parser.parse_args()
+
+    print("slowest imports (cumulative, us):")
+    for cumulative, name in slowest_imports(args.top):
+        print(f"  {cumulative:>8}  {name}")
+
+    samples = [measure_time_to_prompt() for _ in range(args.runs)]
+    median = statistics.median(samples)
+    print(
+        f"\ntime-to-prompt: median {median:.1f}ms, "
+        f"min {min(samples):.1f}ms, max {max(samples):.1f}ms (target {args.target:.0f}ms)"
+    )
+    if median > args.target:
+        print("FAIL: time-to-prompt exceeds target")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,40 @@
 #!/usr/bin/env python3
 """oh-my-code: 轻量级终端 AI 编程助手。"""
 
-from .agent import run
+import sys
+
+from lib.agent import run
+
+
+def main():
+    """解析命令行参数：默认进入交互模式，--batch 进入批处理模式。"""
+    # 无参数时直接进入交互模式，省去 argparse 的导入开销
+    if not sys.argv[1:]:
+        run()
+        return 0
+
+    import argparse
+
+    from lib.config import BATCH_CONCURRENCY
+
+    parser = argparse.ArgumentParser(description="oh-my-code: 轻量级终端 AI 编程助手")
+    parser.add_argument("--batch", metavar="TASKS", help="批处理任务文件（JSONL，- 表示 stdin）")
+    parser.add_argument("-o", "--output", default="-", help="结果输出文件（JSONL，默认 stdout）")
+    parser.add_argument("-j", "--concurrency", type=int, default=BATCH_CONCURRENCY, help="并发数")
+    parser.add_argument("--resume", action="store_true", help="跳过结果文件中已成功的任务")
+    parser.add_argument("--debug", action="store_true", help="批处理时输出工作进程池统计")
+    args = parser.parse_args()
+
+    if args.batch is None:
+        run()
+        return 0
+    if args.resume and args.output == "-":
+        parser.error("--resume 需要通过 -o 指定结果文件")
+
+    from lib.batch import run_batch
+
+    return run_batch(args.batch, args.output, args.concurrency, args.resume, args.debug)
+
 
 if __name__ == "__main__":
-    run()
+    sys.exit(main())
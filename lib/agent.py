@@ -5,8 +5,8 @@ import os
 from .api import call_api
 from .colors import BLUE, BOLD, CYAN, DIM, GREEN, RED, RESET, YELLOW
 from .config import SYSTEM_PROMPT_TEMPLATE
-from .tools import run_tool
-from .ui import print_banner, render_markdown, separator
+from .tools import run_tool, worker_stats
+from .ui import format_worker_stats, print_banner, render_markdown, separator
 
 
 def _handle_text_block(block):
@@ -42,6 +42,9 @@ def _handle_tool_block(block, debug_mode=False):
         if len(result_lines) > 20:
             print(f"  {DIM}│{RESET} {DIM}... ({len(result_lines) - 20} more lines){RESET}")
         print(f"  {DIM}└{'─' * 60}┘{RESET}")
+        stats = worker_stats()
+        if stats:
+            print(f"  {YELLOW}🐛 Workers:{RESET} {DIM}{format_worker_stats(stats)}{RESET}")
 
     return {
         "type": "tool_result",
@@ -50,21 +53,56 @@ def _handle_tool_block(block, debug_mode=False):
     }
 
 
+def _cancelled_results(content_blocks, tool_results):
+    """为被中断、尚未产生结果的 tool_use 生成占位 tool_result，保持历史合法。"""
+    done = {r["tool_use_id"] for r in tool_results}
+    return [
+        {
+            "type": "tool_result",
+            "tool_use_id": block["id"],
+            "content": "error: cancelled by user",
+            "is_error": True,
+        }
+        for block in content_blocks
+        if block["type"] == "tool_use" and block["id"] not in done
+    ]
+
+
+def _append_user_message(messages, text):
+    """追加用户消息；若上一条已是 user（如中断后的 tool_result），则合并进去。"""
+    if not messages or messages[-1]["role"] != "user":
+        messages.append({"role": "user", "content": text})
+        return
+    last = messages[-1]
+    content = last["content"]
+    if isinstance(content, str):
+        content = [{"type": "text", "text": content}]
+    last["content"] = content + [{"type": "text", "text": text}]
+
+
 def _agent_loop(messages, system_prompt, debug_mode=False):
-    """持续调用 API 直到没有工具调用为止。"""
+    """持续调用 API 直到没有工具调用为止。
+
+    被 KeyboardInterrupt 打断时，为未完成的工具补上占位结果后继续抛出。
+    """
     while True:
         response = call_api(messages, system_prompt)
         content_blocks = response.get("content", [])
         tool_results = []
-
-        for block in content_blocks:
-            if block["type"] == "text":
-                _handle_text_block(block)
-            if block["type"] == "tool_use":
-                tool_results.append(_handle_tool_block(block, debug_mode))
-
         messages.append({"role": "assistant", "content": content_blocks})
 
+        try:
+            for block in content_blocks:
+                if block["type"] == "text":
+                    _handle_text_block(block)
+                if block["type"] == "tool_use":
+                    tool_results.append(_handle_tool_block(block, debug_mode))
+        except KeyboardInterrupt:
+            tool_results += _cancelled_results(content_blocks, tool_results)
+            if tool_results:
+                messages.append({"role": "user", "content": tool_results})
+            raise
+
         if not tool_results:
             break
         messages.append({"role": "user", "content": tool_results})
@@ -110,8 +148,13 @@ def run():
                 continue
 
             print(separator("dot"))
-            messages.append({"role": "user", "content": user_input})
-            _agent_loop(messages, system_prompt, debug_mode)
+            _append_user_message(messages, user_input)
+            try:
+                _agent_loop(messages, system_prompt, debug_mode)
+            except KeyboardInterrupt:
+                # 第一次中断只取消当前轮次，回到提示符；在提示符处再次中断则退出
+                print(f"\n\n  {YELLOW}⏹ 已中断当前操作{RESET} {DIM}(再次 Ctrl-C 退出){RESET}\n")
+                continue
             print()
 
         except (KeyboardInterrupt, EOFError):
@@ -1,14 +1,18 @@
 """封装与 LLM API 的通信。"""
 
-import json
-import urllib.request
-
 from .config import API_KEY, API_URL, API_VERSION, MAX_TOKENS, MODEL, OPENROUTER_KEY
 from .tools import make_schema
 
 
 def call_api(messages, system_prompt):
-    """发送消息到 LLM API 并返回解析后的 JSON 响应。"""
+    """发送消息到 LLM API 并返回解析后的 JSON 响应。
+
+    请求被 KeyboardInterrupt 打断时，连接随 with 块退出而关闭。
+    """
+    # urllib.request 会带入 http.client / ssl / email 等模块，推迟到首次请求时导入
+    import json
+    import urllib.request
+
     request = urllib.request.Request(
         API_URL,
         data=json.dumps(
@@ -30,5 +34,5 @@ def call_api(messages, system_prompt):
             ),
         },
     )
-    response = urllib.request.urlopen(request)
-    return json.loads(response.read())
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
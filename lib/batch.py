@@ -0,0 +1,203 @@
+"""批处理模式：从 JSONL 读取任务，并发执行 Agent 循环，结果写回 JSONL。
+
+任务格式（每行一个 JSON）：
+    {"id": "repo-1", "prompt": "...", "cwd": "/path/to/repo"}
+
+id 缺省时使用行号，cwd 缺省时使用当前目录。
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .api import call_api
+from .colors import DIM, GREEN, RED, RESET, YELLOW
+from .config import SYSTEM_PROMPT_TEMPLATE
+from .tools import CancelScope, run_tool, worker_stats
+from .ui import format_worker_stats
+
+
+class _Interrupted(Exception):
+    """批处理被用户中断（Ctrl-C）。"""
+
+
+def _check_interrupted(scope):
+    if scope is not None and scope.cancelled.is_set():
+        raise _Interrupted("interrupted by user")
+
+
+def _parse_task(line, line_num):
+    """解析一行任务；格式不合法时返回带 invalid 说明的任务，由 _run_task 记为错误。"""
+    try:
+        task = json.loads(line)
+    except ValueError as err:
+        return {"id": str(line_num), "cwd": os.getcwd(), "invalid": f"invalid JSON: {err}"}
+    if not isinstance(task, dict):
+        return {"id": str(line_num), "cwd": os.getcwd(), "invalid": "task must be a JSON object"}
+
+    task["id"] = str(task.get("id", line_num))
+    cwd = task.get("cwd") or os.getcwd()
+    if not isinstance(cwd, str):
+        task["cwd"], task["invalid"] = os.getcwd(), "cwd must be a string"
+        return task
+    task["cwd"] = os.path.abspath(cwd)
+    if not isinstance(task.get("prompt"), str) or not task["prompt"]:
+        task["invalid"] = "missing or empty 'prompt'"
+    return task
+
+
+def _load_tasks(path):
+    """读取任务文件（"-" 表示 stdin），返回任务 dict 列表。"""
+    stream = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    tasks = []
+    try:
+        for line_num, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            tasks.append(_parse_task(line, line_num))
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    return tasks
+
+
+def _load_done_ids(path):
+    """读取已有结果文件，返回已成功完成的任务 id 集合。"""
+    if path == "-" or not os.path.exists(path):
+        return set()
+    done = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # 中断时可能留下不完整的最后一行
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+
+def _run_task(task, scope=None):
+    """执行单个任务的 Agent 循环（不打印），返回结果记录。
+
+    scope 被取消时，进行中的工具随之取消，并在下一轮 API 请求前停止，
+    记录为 status "interrupted"。
+    """
+    cwd = task["cwd"]
+    system_prompt = SYSTEM_PROMPT_TEMPLATE.format(cwd=cwd)
+    trace = []
+    usage = {"input_tokens": 0, "output_tokens": 0}
+    final_text = ""
+    started = time.monotonic()
+
+    try:
+        if task.get("invalid"):
+            raise ValueError(task["invalid"])
+        if not os.path.isdir(cwd):
+            raise NotADirectoryError(f"cwd not found: {cwd}")
+        messages = [{"role": "user", "content": task["prompt"]}]
+        while True:
+            _check_interrupted(scope)
+            response = call_api(messages, system_prompt)
+            _check_interrupted(scope)
+            for key in usage:
+                usage[key] += response.get("usage", {}).get(key, 0)
+            content_blocks = response.get("content", [])
+            tool_results = []
+
+            texts = [b["text"] for b in content_blocks if b["type"] == "text"]
+            if texts:
+                final_text = "\n".join(texts)
+            for block in content_blocks:
+                if block["type"] == "tool_use":
+                    result = run_tool(
+                        block["name"], block["input"], cwd=cwd, quiet=True, scope=scope
+                    )
+                    trace.append({"name": block["name"], "input": block["input"], "result": result})
+                    tool_results.append(
+                        {"type": "tool_result", "tool_use_id": block["id"], "content": result}
+                    )
+
+            messages.append({"role": "assistant", "content": content_blocks})
+            if not tool_results:
+                break
+            messages.append({"role": "user", "content": tool_results})
+        status, error = "ok", None
+    except _Interrupted as err:
+        status, error = "interrupted", str(err)
+    except Exception as err:
+        status, error = "error", str(err)
+
+    return {
+        "id": task["id"],
+        "status": status,
+        "error": error,
+        "cwd": cwd,
+        "final_text": final_text,
+        "tool_trace": trace,
+        "usage": usage,
+        "latency": round(time.monotonic() - started, 3),
+    }
+
+
+def run_batch(tasks_path, output_path="-", concurrency=4, resume=False, debug=False):
+    """批处理入口：并发执行任务，每完成一个即追加写入结果。
+
+    resume 为 True 时跳过结果文件中已成功的任务，并在原文件后追加；
+    debug 为 True 时每完成一个任务在 stderr 输出工作进程池统计。
+
+    Ctrl-C 时取消所有进行中的工具、丢弃尚未开始的任务，进行中的任务在当前
+    API 请求结束后记为 "interrupted"（--resume 会重新执行）；等待期间再次
+    Ctrl-C 立即退出。
+    """
+    tasks = _load_tasks(tasks_path)
+    if resume:
+        done = _load_done_ids(output_path)
+        tasks = [t for t in tasks if t["id"] not in done]
+
+    if output_path == "-":
+        out = sys.stdout
+    else:
+        out = open(output_path, "a" if resume else "w", encoding="utf-8")
+    lock = threading.Lock()
+    scope = CancelScope()
+    failed = 0
+
+    def _worker(task):
+        nonlocal failed
+        record = _run_task(task, scope)
+        with lock:
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            if record["status"] != "ok":
+                failed += 1
+            mark = f"{GREEN}✓{RESET}" if record["status"] == "ok" else f"{RED}✖{RESET}"
+            print(f"  {mark} {record['id']} {DIM}({record['latency']}s){RESET}", file=sys.stderr)
+            stats = worker_stats() if debug else None
+            if stats:
+                print(f"    {YELLOW}🐛 Workers:{RESET} {DIM}{format_worker_stats(stats)}{RESET}", file=sys.stderr)
+
+    print(f"  {DIM}▶ {len(tasks)} tasks, concurrency {concurrency}{RESET}", file=sys.stderr)
+    executor = ThreadPoolExecutor(max_workers=max(1, concurrency))
+    try:
+        futures = [executor.submit(_worker, task) for task in tasks]
+        for future in futures:
+            future.result()
+    except KeyboardInterrupt:
+        print(f"\n  {YELLOW}⏹ 已中断，等待进行中的任务停止{RESET} {DIM}(再次 Ctrl-C 立即退出){RESET}", file=sys.stderr)
+        scope.cancel()
+        try:
+            executor.shutdown(wait=True, cancel_futures=True)
+        except KeyboardInterrupt:
+            out.flush()
+            os._exit(130)
+        return 130
+    finally:
+        executor.shutdown(wait=False)
+        if out is not sys.stdout:
+            out.close()
+    return 1 if failed else 0
@@ -25,5 +25,22 @@ SYSTEM_PROMPT_TEMPLATE = "Concise coding assistant. cwd: {cwd}"
 # 命令超时（秒）
 BASH_TIMEOUT = 30
 
+# 工具执行截止时间（秒），由 run_tool 统一强制；未列出的工具使用 TOOL_TIMEOUT
+TOOL_TIMEOUT = 60
+TOOL_TIMEOUTS = {"bash": BASH_TIMEOUT}
+
 # Debug 模式（显示工具调用的详细数据）
 DEBUG_MODE = False
+
+# 批处理模式默认并发数
+BATCH_CONCURRENCY = 4
+
+# 插件：目录下的 .py 文件及该 entry point 组中的工具会在首次使用工具时加载
+PLUGIN_DIR = os.environ.get("OH_MY_CODE_PLUGIN_DIR", os.path.expanduser("~/.oh-my-code/plugins"))
+PLUGIN_ENTRY_POINT = "oh_my_code.tools"
+
+# 在工作进程池中执行的工具（CPU 密集型，避免阻塞主进程 / 占用 GIL）
+WORKER_TOOLS = ("grep", "browse")
+WORKER_PROCESSES = min(4, os.cpu_count() or 1)
+# 排队等待空闲工作进程的上限（秒），不计入工具自身的截止时间
+WORKER_QUEUE_TIMEOUT = 300
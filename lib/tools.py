@@ -1,382 +1,366 @@
-"""内置工具实现与注册。"""
+"""工具注册表、调度执行与 Schema 生成。
 
-import glob as globlib
-import html
+工具实现位于 tool_impl.py，注册表只保存 "模块:函数" 引用，首次调用时才导入，
+避免启动时加载 subprocess / urllib 等较重的标准库模块。
+
+插件可通过 @tool 装饰器在实现处声明 schema 并注册，来源为 PLUGIN_DIR 下的
+.py 文件或 PLUGIN_ENTRY_POINT 组的 entry points。WORKER_TOOLS 中的工具在
+工作进程池中执行（见 workers.py）。
+"""
+
+import importlib
 import os
-import re
-import subprocess
-import urllib.parse
-import urllib.request
+import signal
+import sys
+import threading
 
-from .colors import DIM, RESET
-from .config import BASH_TIMEOUT
+from .colors import RESET, YELLOW
+from .config import (
+    PLUGIN_DIR, PLUGIN_ENTRY_POINT, TOOL_TIMEOUT, TOOL_TIMEOUTS, WORKER_QUEUE_TIMEOUT,
+    WORKER_TOOLS,
+)
 
 
-# --------------- 工具实现 ---------------
+# --------------- 执行上下文 ---------------
 
+# 当前线程的工具执行上下文：批处理模式下每个任务有独立的 cwd，且不向终端输出
+_context = threading.local()
 
-def tool_read(args):
-    """读取文件内容并附带行号。"""
-    with open(args["path"], "r", encoding="utf-8") as f:
-        lines = f.readlines()
-    offset = args.get("offset", 0)
-    limit = args.get("limit", len(lines))
-    selected = lines[offset : offset + limit]
-    return "".join(
-        f"{offset + idx + 1:4}| {line}" for idx, line in enumerate(selected)
-    )
+# 取消后等待工具收尾（返回部分结果）的时间（秒）
+_CANCEL_GRACE = 1.0
 
 
-def tool_write(args):
-    """写入文件。"""
-    with open(args["path"], "w", encoding="utf-8") as f:
-        f.write(args["content"])
-    return "ok"
-
-
-def tool_edit(args):
-    """在文件中替换文本（old 必须唯一，除非 all=true）。"""
-    with open(args["path"], "r", encoding="utf-8") as f:
-        text = f.read()
-    old, new = args["old"], args["new"]
-    if old not in text:
-        return "error: old_string not found"
-    count = text.count(old)
-    if not args.get("all") and count > 1:
-        return f"error: old_string appears {count} times, must be unique (use all=true)"
-    replacement = (
-        text.replace(old, new) if args.get("all") else text.replace(old, new, 1)
-    )
-    with open(args["path"], "w", encoding="utf-8") as f:
-        f.write(replacement)
-    return "ok"
-
-
-def tool_glob(args):
-    """按 glob 模式查找文件，按修改时间降序排列。"""
-    pattern = (args.get("path", ".") + "/" + args["pat"]).replace("//", "/")
-    files = globlib.glob(pattern, recursive=True)
-    files = sorted(
-        files,
-        key=lambda f: os.path.getmtime(f) if os.path.isfile(f) else 0,
-        reverse=True,
-    )
-    return "\n".join(files) or "none"
+class _ToolCall:
+    """单次工具调用的取消句柄：取消时依次执行登记的回调（如杀掉子进程组）。"""
 
+    def __init__(self):
+        self.cancelled = threading.Event()
+        # 工具开始执行（进程池中为取得工作进程）时置位，截止时间从此刻起算
+        self.started = threading.Event()
+        self.callbacks = []
 
-def tool_grep(args):
-    """在文件中搜索正则表达式。"""
-    pattern = re.compile(args["pat"])
-    hits = []
-    for filepath in globlib.glob(args.get("path", ".") + "/**", recursive=True):
-        try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                for line_num, line in enumerate(f, 1):
-                    if pattern.search(line):
-                        hits.append(f"{filepath}:{line_num}:{line.rstrip()}")
-        except Exception:
-            pass
-    return "\n".join(hits[:50]) or "none"
-
-
-def tool_bash(args):
-    """执行 shell 命令并实时输出。"""
-    proc = subprocess.Popen(
-        args["cmd"],
-        shell=True,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
-    )
-    output_lines = []
-    try:
-        if proc.stdout is not None:
-            while True:
-                line = proc.stdout.readline()
-                if not line and proc.poll() is not None:
-                    break
-                if line:
-                    print(f"    {DIM}┊ {line.rstrip()}{RESET}", flush=True)
-                    output_lines.append(line)
-        proc.wait(timeout=BASH_TIMEOUT)
-    except subprocess.TimeoutExpired:
-        proc.kill()
-        output_lines.append(f"\n(timed out after {BASH_TIMEOUT}s)")
-    return "".join(output_lines).strip() or "(empty)"
-
-
-def tool_search(args):
-    """通过搜索引擎搜索信息并返回结果摘要。"""
-    query = args["query"]
-    engine = args.get("engine", "duckduckgo")  # 默认使用 DuckDuckGo（更友好）
-    limit = args.get("limit", 5)  # 默认返回 5 个结果
-    
+    def on_cancel(self, callback):
+        """登记取消回调；若调用已被取消则立即执行。"""
+        self.callbacks.append(callback)
+        if self.cancelled.is_set():
+            callback()
+
+    def track(self, proc):
+        """登记子进程，取消时杀掉其所在的进程组。"""
+        self.on_cancel(lambda: _kill_group(proc))
+
+    def cancel(self):
+        """标记取消并执行所有回调。"""
+        self.cancelled.set()
+        for callback in list(self.callbacks):
+            callback()
+
+
+class CancelScope:
+    """一组工具调用的外部取消句柄（如批处理的所有任务）。
+
+    cancel() 取消其中所有进行中的调用，之后加入的调用会被立即取消；
+    调用方也可以检查 cancelled 在两轮 API 请求之间停止。
+    """
+
+    def __init__(self):
+        self.cancelled = threading.Event()
+        self._calls = set()
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled.set()
+            calls = list(self._calls)
+        for call in calls:
+            call.cancel()
+
+    def _add(self, call):
+        with self._lock:
+            self._calls.add(call)
+            cancelled = self.cancelled.is_set()
+        if cancelled:
+            call.cancel()
+
+    def _discard(self, call):
+        with self._lock:
+            self._calls.discard(call)
+
+
+def _kill_group(proc):
+    """杀掉子进程所在的进程组（不支持进程组的平台上只杀子进程）。"""
+    if proc.poll() is not None:
+        return
     try:
-        if engine.lower() == "duckduckgo":
-            return _search_duckduckgo(query, limit)
-       
-        elif engine.lower() == "searx":
-            return _search_searx(query, limit)
+        if hasattr(os, "killpg"):
+            os.killpg(proc.pid, signal.SIGKILL)
         else:
-            return f"error: unsupported search engine '{engine}'. Use 'duckduckgo', 'bing', or 'searx'"
-    except Exception as e:
-        return f"error: search failed - {str(e)}"
-
-
-def _search_duckduckgo(query, limit):
-    """使用 DuckDuckGo 搜索（对自动化更友好）。"""
-    import json
-    import time
-    import random
-    
-    # 添加随机延迟避免被检测
-    time.sleep(random.uniform(0.5, 1.5))
-    
-    encoded_query = urllib.parse.quote_plus(query)
-    
-    # 使用 DuckDuckGo 的即时答案 API
-    api_url = f"https://api.duckduckgo.com/?q={encoded_query}&format=json&no_html=1&skip_disambig=1"
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'application/json, text/plain, */*',
-        'Accept-Language': 'en-US,en;q=0.9,zh-CN;q=0.8,zh;q=0.7',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'DNT': '1',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-    }
-    
-    try:
-        req = urllib.request.Request(api_url, headers=headers)
-        with urllib.request.urlopen(req, timeout=15) as response:
-            data = json.loads(response.read().decode('utf-8'))
-        
-        results = []
-        
-        # 处理即时答案
-        if data.get('Abstract'):
-            results.append(f"• {data.get('Heading', 'Summary')}\n  {data.get('AbstractURL', '')}\n  {data['Abstract'][:300]}...\n")
-        
-        # 处理相关主题
-        for topic in data.get('RelatedTopics', [])[:limit]:
-            if isinstance(topic, dict) and 'Text' in topic:
-                title = topic.get('Text', '').split(' - ')[0] if ' - ' in topic.get('Text', '') else topic.get('Text', '')[:100]
-                url = topic.get('FirstURL', '')
-                text = topic.get('Text', '')[:200]
-                results.append(f"• {title}\n  {url}\n  {text}...\n")
-        
-        if not results:
-            # 如果 API 没有结果，尝试搜索页面
-            return _search_duckduckgo_html(query, limit)
-        
-        return f"Search Results (DuckDuckGo):\n\n" + "\n".join(results[:limit])
-        
-    except Exception as e:
-        # API 失败时回退到 HTML 搜索
-        return _search_duckduckgo_html(query, limit)
-
-
-def _search_duckduckgo_html(query, limit):
-    """DuckDuckGo HTML 搜索（备用方案）。"""
-    import time
-    import random
-    
-    time.sleep(random.uniform(1, 2))
-    
-    encoded_query = urllib.parse.quote_plus(query)
-    url = f"https://duckduckgo.com/html/?q={encoded_query}"
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'DNT': '1',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-    }
-    
-    req = urllib.request.Request(url, headers=headers)
-    with urllib.request.urlopen(req, timeout=15) as response:
-        html_content = response.read().decode('utf-8', errors='ignore')
-    
-    return _extract_duckduckgo_results(html_content, limit)
-
-
-def _search_searx(query, limit):
-    """使用 SearX 公共实例搜索。"""
-    import json
-    import time
-    import random
-    
-    time.sleep(random.uniform(0.3, 1.0))
-    
-    # SearX 公共实例列表
-    searx_instances = [
-        "https://searx.be",
-        "https://search.sapti.me",
-        "https://searx.xyz",
-        "https://searx.info",
-    ]
-    
-    encoded_query = urllib.parse.quote_plus(query)
-    
-    for instance in searx_instances:
-        try:
-            api_url = f"{instance}/search?q={encoded_query}&format=json&categories=general"
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Accept': 'application/json',
-            }
-            
-            req = urllib.request.Request(api_url, headers=headers)
-            with urllib.request.urlopen(req, timeout=10) as response:
-                data = json.loads(response.read().decode('utf-8'))
-            
-            results = []
-            for item in data.get('results', [])[:limit]:
-                title = item.get('title', '')
-                url = item.get('url', '')
-                content = item.get('content', '')[:200]
-                results.append(f"• {title}\n  {url}\n  {content}...\n")
-            
-            if results:
-                return f"Search Results (SearX):\n\n" + "\n".join(results)
-                
-        except Exception:
-            continue  # 尝试下一个实例
-    
-    return "error: all SearX instances failed"
-
-
-def _extract_duckduckgo_results(html_content, limit):
-    """从 DuckDuckGo HTML 中提取搜索结果。"""
-    results = []
-    
-    # DuckDuckGo 结果提取模式
-    pattern = r'<a[^>]+class="result__a"[^>]+href="([^"]+)"[^>]*>([^<]+)</a>.*?<a[^>]+class="result__snippet"[^>]*>([^<]+)</a>'
-    matches = re.findall(pattern, html_content, re.DOTALL | re.IGNORECASE)
-    
-    for url, title, snippet in matches[:limit]:
-        title = html.unescape(title.strip())
-        snippet = html.unescape(re.sub(r'<[^>]+>', '', snippet.strip()))
-        results.append(f"• {title}\n  {url}\n  {snippet[:200]}...\n")
-    
-    if not results:
-        # 尝试另一种模式
-        pattern2 = r'<h2[^>]*><a[^>]+href="([^"]+)"[^>]*>([^<]+)</a></h2>.*?<span[^>]*>([^<]+)</span>'
-        matches2 = re.findall(pattern2, html_content, re.DOTALL | re.IGNORECASE)
-        
-        for url, title, snippet in matches2[:limit]:
-            title = html.unescape(title.strip())
-            snippet = html.unescape(re.sub(r'<[^>]+>', '', snippet.strip()))
-            results.append(f"• {title}\n  {url}\n  {snippet[:200]}...\n")
-    
-    if not results:
-        return "No search results found. The search may have been blocked or the page format changed."
-    
-    return f"Search Results (DuckDuckGo):\n\n" + "\n".join(results)
-
-
-def tool_browse(args):
-    """访问指定网页并提取文本内容。"""
-    url = args["url"]
-    
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req, timeout=15) as response:
-            html_content = response.read().decode('utf-8', errors='ignore')
-        
-        # 提取标题
-        title_match = re.search(r'<title[^>]*>([^<]+)</title>', html_content, re.IGNORECASE)
-        title = html.unescape(title_match.group(1).strip()) if title_match else "No title"
-        
-        # 移除脚本和样式标签
-        html_content = re.sub(r'<script[^>]*>.*?</script>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
-        html_content = re.sub(r'<style[^>]*>.*?</style>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
-        
-        # 提取文本内容
-        text_content = re.sub(r'<[^>]+>', ' ', html_content)
-        text_content = html.unescape(text_content)
-        text_content = re.sub(r'\s+', ' ', text_content).strip()
-        
-        # 限制长度
-        max_length = 3000
-        if len(text_content) > max_length:
-            text_content = text_content[:max_length] + "...\n\n[Content truncated]"
-        
-        return f"Title: {title}\nURL: {url}\n\nContent:\n{text_content}"
-        
-    except Exception as e:
-        return f"error: failed to browse {url} - {str(e)}"
+            proc.kill()
+    except OSError:
+        pass
+
+
+def _cancelled():
+    """当前工具调用是否已被取消（超时或用户中断）。"""
+    call = getattr(_context, "call", None)
+    return call is not None and call.cancelled.is_set()
+
+
+def resolve_path(path):
+    """将相对路径解析到当前调用的工作目录（run_tool 的 cwd，未设置时保持原样）。
+
+    工具实现（包括插件）处理路径参数时都应经过这里，批处理模式下每个任务的
+    cwd 不同，且进程内与工作进程中执行时都有效。
+    """
+    cwd = getattr(_context, "cwd", None)
+    return os.path.join(cwd, path) if cwd else path
 
 
 # --------------- 工具注册表 ---------------
 
-# 每个工具：(描述, 参数 schema 简写, 实现函数)
-# 参数类型后缀 "?" 表示可选
+# 每个工具：(描述, 参数 schema 简写, 实现引用 "模块:函数")
+# 参数类型后缀 "?" 表示可选；模块名以 "." 开头时相对本包导入
 TOOLS = {
     "read": (
         "Read file with line numbers (file path, not directory)",
         {"path": "string", "offset": "number?", "limit": "number?"},
-        tool_read,
+        ".tool_impl:tool_read",
     ),
     "write": (
         "Write content to file",
         {"path": "string", "content": "string"},
-        tool_write,
+        ".tool_impl:tool_write",
     ),
     "edit": (
         "Replace old with new in file (old must be unique unless all=true)",
         {"path": "string", "old": "string", "new": "string", "all": "boolean?"},
-        tool_edit,
+        ".tool_impl:tool_edit",
     ),
     "glob": (
         "Find files by pattern, sorted by mtime",
         {"pat": "string", "path": "string?"},
-        tool_glob,
+        ".tool_impl:tool_glob",
     ),
     "grep": (
         "Search files for regex pattern",
         {"pat": "string", "path": "string?"},
-        tool_grep,
+        ".tool_impl:tool_grep",
     ),
     "bash": (
         "Run shell command",
         {"cmd": "string"},
-        tool_bash,
+        ".tool_impl:tool_bash",
     ),
     "search": (
         "Search the web using search engines (duckduckgo/searx)",
         {"query": "string", "engine": "string?", "limit": "number?"},
-        tool_search,
+        ".tool_impl:tool_search",
     ),
     "browse": (
         "Browse a specific webpage and extract its text content",
         {"url": "string"},
-        tool_browse,
+        ".tool_impl:tool_browse",
     ),
 }
 
 
-def run_tool(name, args):
-    """执行指定工具，捕获异常返回错误信息。"""
+# 在工作进程池中执行的工具
+_PROCESS_TOOLS = set(WORKER_TOOLS)
+
+_plugins_lock = threading.Lock()
+_plugins_loaded = False
+
+# 插件目录中的文件以该前缀作为模块名加载
+_PLUGIN_NAMESPACE = "oh_my_code_plugins"
+
+
+def register_tool(name, description, params, impl, timeout=None, process=False):
+    """注册（或覆盖）一个工具。
+
+    impl 为 "模块:函数" 引用或模块级函数；timeout 覆盖默认截止时间；
+    process 为 True 时该工具在工作进程池中执行。
+    """
+    global _SCHEMA
+    ref = impl if isinstance(impl, str) else f"{impl.__module__}:{impl.__qualname__}"
+    if name in TOOLS and TOOLS[name][2] != ref:
+        print(
+            f"  {YELLOW}⚠ 工具 {name} 已注册（{TOOLS[name][2]}），被 {ref} 覆盖{RESET}",
+            file=sys.stderr,
+        )
+    TOOLS[name] = (description, params, ref)
+    if timeout is not None:
+        TOOL_TIMEOUTS[name] = timeout
+    if process:
+        _PROCESS_TOOLS.add(name)
+    _SCHEMA = None
+
+
+def tool(name, description, params, timeout=None, process=False):
+    """装饰器：在工具实现处声明 schema 并注册。
+
+    用法：
+        @tool("wc", "Count lines in file", {"path": "string"}, process=True)
+        def tool_wc(args):
+            with open(resolve_path(args["path"]), encoding="utf-8") as f:
+                ...
+    """
+
+    def decorator(fn):
+        register_tool(name, description, params, fn, timeout, process)
+        return fn
+
+    return decorator
+
+
+def _import_plugin_file(stem):
+    """以 "oh_my_code_plugins.<stem>" 为模块名加载插件目录下的文件。
+
+    不修改 sys.path，插件文件名不会遮蔽标准库或其他同名模块；工作进程中
+    _load_impl 也通过这里按同一模块名重新加载。
+    """
+    import importlib.util
+
+    module_name = f"{_PLUGIN_NAMESPACE}.{stem}"
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(
+        module_name, os.path.join(PLUGIN_DIR, f"{stem}.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
     try:
-        return TOOLS[name][2](args)
-    except Exception as err:
-        return f"error: {err}"
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[module_name]
+        raise
+    return module
+
+
+def _import_plugin_dir(plugin_dir):
+    """导入插件目录下的 .py 文件。"""
+    if not os.path.isdir(plugin_dir):
+        return
+    for filename in sorted(os.listdir(plugin_dir)):
+        if not filename.endswith(".py") or filename.startswith("_"):
+            continue
+        try:
+            _import_plugin_file(filename[:-3])
+        except Exception as err:
+            print(f"  {YELLOW}⚠ 插件 {filename} 加载失败: {err}{RESET}", file=sys.stderr)
 
 
-def make_schema():
+def _import_entry_points(group):
+    """加载指定组的 entry points（模块或被 @tool 装饰的函数）。"""
+    from importlib.metadata import entry_points
+
+    for entry_point in entry_points(group=group):
+        try:
+            entry_point.load()
+        except Exception as err:
+            print(f"  {YELLOW}⚠ 插件 {entry_point.name} 加载失败: {err}{RESET}", file=sys.stderr)
+
+
+def load_plugins():
+    """加载插件目录与 entry points 中的工具（只执行一次，线程安全）。"""
+    global _plugins_loaded
+    with _plugins_lock:
+        if _plugins_loaded:
+            return
+        _plugins_loaded = True
+        _import_plugin_dir(PLUGIN_DIR)
+        _import_entry_points(PLUGIN_ENTRY_POINT)
+
+
+def _load_impl(ref):
+    """按 "模块:函数" 引用加载工具实现（模块已导入时直接命中 sys.modules）。"""
+    module_name, _, attr = ref.partition(":")
+    if module_name.startswith(f"{_PLUGIN_NAMESPACE}."):
+        module = _import_plugin_file(module_name[len(_PLUGIN_NAMESPACE) + 1:])
+    else:
+        module = importlib.import_module(module_name, __package__)
+    return getattr(module, attr)
+
+
+def worker_stats():
+    """返回工作进程池统计并开始新的统计窗口（尚未启动时返回 None），供 debug 模式显示。"""
+    # 工作进程池可能正在后台线程中导入，模块尚未初始化完成时视为未启动
+    stats = getattr(sys.modules.get(f"{__package__}.workers"), "stats", None)
+    return stats() if stats else None
+
+
+def run_tool(name, args, cwd=None, quiet=False, scope=None):
+    """执行指定工具，捕获异常返回错误信息。
+
+    cwd 指定相对路径的解析目录，quiet 为 True 时不向终端打印实时输出。
+    工具在后台线程中运行（_PROCESS_TOOLS 中的工具再转交工作进程池），截止
+    时间由 TOOL_TIMEOUTS 统一控制，从工具真正开始执行（取得工作进程）时
+    起算；排队等待工作进程另受 WORKER_QUEUE_TIMEOUT 限制。超时后取消调用
+    （杀掉子进程组或工作进程）并返回已有的部分结果。等待期间收到
+    KeyboardInterrupt 时同样取消调用，然后继续抛出；scope（CancelScope）
+    被其他线程取消时，调用随之取消并返回已有结果。
+    """
+    load_plugins()
+    call = _ToolCall()
+    outcome = {}
+    # done：工具已结束；wake：工具结束或调用被取消，唤醒等待
+    done = threading.Event()
+    wake = threading.Event()
+    call.on_cancel(wake.set)
+
+    def _target():
+        _context.cwd, _context.quiet, _context.call = cwd, quiet, call
+        try:
+            ref = TOOLS[name][2]
+            if name in _PROCESS_TOOLS:
+                from .workers import run_in_worker
+
+                outcome["result"] = run_in_worker(ref, args, cwd, quiet, call)
+            else:
+                call.started.set()
+                outcome["result"] = _load_impl(ref)(args)
+        except Exception as err:
+            if not call.cancelled.is_set():
+                outcome["result"] = f"error: {err}"
+        finally:
+            call.started.set()
+            done.set()
+            wake.set()
+
+    timeout = TOOL_TIMEOUTS.get(name, TOOL_TIMEOUT)
+    thread = threading.Thread(target=_target, name=f"tool-{name}", daemon=True)
+    if scope is not None:
+        scope._add(call)
+    thread.start()
+    try:
+        if not call.started.wait(WORKER_QUEUE_TIMEOUT):
+            call.cancel()
+            done.wait(_CANCEL_GRACE)
+            return f"error: no tool worker available after {WORKER_QUEUE_TIMEOUT}s in queue"
+        wake.wait(timeout)
+    except KeyboardInterrupt:
+        call.cancel()
+        raise
+    finally:
+        if scope is not None:
+            scope._discard(call)
+
+    if not done.is_set() and call.cancelled.is_set():
+        # 被 scope 取消：等工具收尾后返回已有结果
+        done.wait(_CANCEL_GRACE)
+        return outcome.get("result", "error: cancelled")
+    if not done.is_set():
+        call.cancel()
+        done.wait(_CANCEL_GRACE)
+        if "result" not in outcome:
+            return f"error: timed out after {timeout}s"
+        return f"{outcome['result']}\n(timed out after {timeout}s)"
+    return outcome.get("result", "error: cancelled")
+
+
+def _build_schema():
     """将工具注册表转换为 Anthropic API tools schema 格式。"""
     result = []
-    for name, (description, params, _fn) in TOOLS.items():
+    for name, (description, params, _ref) in TOOLS.items():
         properties = {}
         required = []
         for param_name, param_type in params.items():
@@ -399,3 +383,16 @@ def make_schema():
             }
         )
     return result
+
+
+# 内置工具的 schema 在导入时生成一次；注册新工具后失效，下次使用时重建
+_SCHEMA = _build_schema()
+
+
+def make_schema():
+    """返回缓存的 tools schema（首次调用时先加载插件）。"""
+    global _SCHEMA
+    load_plugins()
+    if _SCHEMA is None:
+        _SCHEMA = _build_schema()
+    return _SCHEMA
@@ -80,6 +80,19 @@ def render_markdown(text):
     return "\n".join(result)
 
 
+# --------------- 工作进程池统计 ---------------
+
+
+def format_worker_stats(stats):
+    """把 worker_stats() 的结果格式化为一行摘要（利用率与峰值统计自上次读取起）。"""
+    return (
+        f"{stats['busy']}/{stats['workers']} busy now, "
+        f"{stats['utilisation']:.0%} utilised over {stats['window']:.1f}s, "
+        f"{stats['calls']} calls, peak queue {stats['peak_queued']}, "
+        f"{stats['crashed']} crashed"
+    )
+
+
 # --------------- 启动 Banner ---------------
 
 
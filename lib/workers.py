@@ -0,0 +1,213 @@
+"""工具工作进程池：预先启动的进程通过管道接收调用、返回结果。
+
+CPU 密集型工具在工作进程中执行，可以利用多核且不占用主进程的 GIL；
+工作进程崩溃或被取消时只影响当前调用，池会自动补充新的进程。
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+from .config import WORKER_PROCESSES
+from .tools import _ToolCall, _context, _load_impl
+
+# 取消时等待工作进程响应 SIGTERM（清理子进程组）的时间（秒）
+_TERMINATE_GRACE = 0.5
+
+
+def _worker_main(conn):
+    """工作进程主循环：接收 (引用, 参数, cwd, quiet)，执行后把结果发回管道。"""
+    import signal
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C 由主进程统一处理
+
+    def _on_terminate(_signum, _frame):
+        call = getattr(_context, "call", None)
+        if call is not None:
+            call.cancel()  # 杀掉工具启动的子进程组
+        os._exit(1)
+
+    signal.signal(signal.SIGTERM, _on_terminate)
+
+    while True:
+        try:
+            ref, args, cwd, quiet = conn.recv()
+        except (EOFError, OSError):
+            return
+        _context.cwd, _context.quiet, _context.call = cwd, quiet, _ToolCall()
+        try:
+            result = _load_impl(ref)(args)
+        except Exception as err:
+            result = f"error: {err}"
+        conn.send(result)
+
+
+class _WorkerPool:
+    """固定大小的工作进程池。
+
+    除当前繁忙数与排队数外，还按统计窗口累计繁忙进程·秒与最大排队数：
+    交互模式下工具串行执行，返回后再读瞬时值总是 0，需要看窗口内的累计值。
+    """
+
+    def __init__(self, size):
+        methods = multiprocessing.get_all_start_methods()
+        # forkserver 从干净的单线程进程 fork，避免在多线程的主进程里直接 fork
+        self._ctx = multiprocessing.get_context(
+            "forkserver" if "forkserver" in methods else "spawn"
+        )
+        self.size = size
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self.busy = 0
+        self.queued = 0
+        self.crashed = 0
+        # 统计窗口（每次 stats() 读取后重置）
+        self._window_start = self._last_change = time.monotonic()
+        self._busy_seconds = 0.0
+        self._peak_queued = 0
+        self._calls = 0
+
+    def _account(self):
+        """把上次变化以来的繁忙时间累加进窗口（调用方需持有 _lock）。"""
+        now = time.monotonic()
+        self._busy_seconds += self.busy * (now - self._last_change)
+        self._last_change = now
+        return now
+
+    def start(self):
+        """启动全部工作进程。"""
+        for _ in range(self.size):
+            self._idle.put(self._spawn())
+
+    def stats(self):
+        """返回当前状态与本统计窗口的利用率、最大排队数、调用数，并开始新窗口。"""
+        with self._lock:
+            now = self._account()
+            window = now - self._window_start
+            result = {
+                "workers": self.size,
+                "busy": self.busy,
+                "queued": self.queued,
+                "crashed": self.crashed,
+                "utilisation": self._busy_seconds / (self.size * window) if window > 0 else 0.0,
+                "peak_queued": self._peak_queued,
+                "calls": self._calls,
+                "window": window,
+            }
+            self._window_start = now
+            self._busy_seconds = 0.0
+            self._peak_queued = self.queued
+            self._calls = 0
+            return result
+
+    def _spawn(self):
+        parent_conn, child_conn = self._ctx.Pipe()
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn,),
+            name="oh-my-code-tool-worker",
+            daemon=True,
+        )
+        proc.start()
+        child_conn.close()
+        return proc, parent_conn
+
+    def _acquire(self, call):
+        """取一个空闲工作进程；等待期间调用被取消则放弃。"""
+        with self._lock:
+            self.queued += 1
+            self._peak_queued = max(self._peak_queued, self.queued)
+        try:
+            while True:
+                try:
+                    return self._idle.get(timeout=0.1)
+                except queue.Empty:
+                    if call.cancelled.is_set():
+                        raise RuntimeError("cancelled while waiting for a tool worker")
+        finally:
+            with self._lock:
+                self.queued -= 1
+
+    def run(self, ref, args, cwd, quiet, call):
+        """在工作进程中执行工具并返回结果；进程崩溃或被取消时替换它。"""
+        proc, conn = worker = self._acquire(call)
+        call.started.set()
+        # 调用结束后进程会被复用：结束标记与取消回调在同一把锁下检查/设置，
+        # 避免回调在进程归还后误杀正在服务其他调用的进程
+        guard = threading.Lock()
+        finished = False
+
+        def _cancel():
+            with guard:
+                if not finished:
+                    _terminate(proc)
+
+        with self._lock:
+            self._account()
+            self.busy += 1
+            self._calls += 1
+        try:
+            call.on_cancel(_cancel)
+            conn.send((ref, args, cwd, quiet))
+            return conn.recv()
+        except (EOFError, OSError):
+            proc.join(_TERMINATE_GRACE)
+            conn.close()
+            worker = self._spawn()
+            if call.cancelled.is_set():
+                raise RuntimeError("cancelled")
+            with self._lock:
+                self.crashed += 1
+            raise RuntimeError(f"tool worker crashed (exit code {proc.exitcode})")
+        finally:
+            with guard:
+                finished = True
+            if worker[0] is proc and not proc.is_alive():
+                # 结果已返回但进程随即被取消回调杀掉，归还前先替换
+                conn.close()
+                worker = self._spawn()
+            with self._lock:
+                self._account()
+                self.busy -= 1
+            self._idle.put(worker)
+
+
+def _terminate(proc):
+    """先发 SIGTERM 让工作进程清理子进程组，超时仍未退出则强制杀掉。"""
+    if not proc.is_alive():
+        return
+    proc.terminate()
+    proc.join(_TERMINATE_GRACE)
+    if proc.is_alive():
+        proc.kill()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """返回全局工作进程池，首次调用时启动全部工作进程。
+
+    只在第一次执行进程池工具时触发，从不调用 grep / browse 等工具的
+    短生命周期进程（如批处理）不会启动 forkserver 和工作进程。
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            pool = _WorkerPool(WORKER_PROCESSES)
+            pool.start()
+            _pool = pool
+        return _pool
+
+
+def run_in_worker(ref, args, cwd, quiet, call):
+    """在工作进程池中执行 "模块:函数" 引用的工具。"""
+    return get_pool().run(ref, args, cwd, quiet, call)
+
+
+def stats():
+    """返回全局工作进程池的统计（见 _WorkerPool.stats），未启动时返回 None。"""
+    return _pool.stats() if _pool is not None else None
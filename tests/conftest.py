@@ -0,0 +1,6 @@
+"""测试配置：把仓库根目录加入 sys.path，使 lib 可被导入。"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,49 @@
+"""Agent 主循环中断处理的测试。"""
+
+from lib.agent import _append_user_message, _cancelled_results
+
+
+def _tool_use(tool_id):
+    return {"type": "tool_use", "id": tool_id, "name": "bash", "input": {"cmd": "true"}}
+
+
+def test_cancelled_results_fill_only_unfinished_tools():
+    blocks = [{"type": "text", "text": "hi"}, _tool_use("a"), _tool_use("b")]
+    done = [{"type": "tool_result", "tool_use_id": "a", "content": "ok"}]
+
+    results = _cancelled_results(blocks, done)
+
+    assert [r["tool_use_id"] for r in results] == ["b"]
+    assert results[0]["is_error"] is True
+    assert results[0]["content"] == "error: cancelled by user"
+
+
+def test_cancelled_results_empty_without_tool_use():
+    assert _cancelled_results([{"type": "text", "text": "hi"}], []) == []
+
+
+def test_append_user_message_after_assistant():
+    messages = [{"role": "assistant", "content": []}]
+    _append_user_message(messages, "next")
+    assert messages[-1] == {"role": "user", "content": "next"}
+
+
+def test_append_user_message_merges_into_tool_results():
+    result = {"type": "tool_result", "tool_use_id": "a", "content": "x"}
+    messages = [{"role": "user", "content": [result]}]
+
+    _append_user_message(messages, "next")
+
+    assert len(messages) == 1
+    assert messages[0]["content"] == [result, {"type": "text", "text": "next"}]
+
+
+def test_append_user_message_merges_into_plain_text():
+    messages = [{"role": "user", "content": "first"}]
+
+    _append_user_message(messages, "second")
+
+    assert messages[0]["content"] == [
+        {"type": "text", "text": "first"},
+        {"type": "text", "text": "second"},
+    ]
@@ -0,0 +1,185 @@
+"""批处理模式的测试（call_api 以桩替代，不访问网络）。"""
+
+import json
+
+import pytest
+
+from lib import batch
+from lib.batch import _load_done_ids, _parse_task, run_batch
+from lib.tools import CancelScope
+
+
+def _tool_use(tool_id, name, args):
+    return {"type": "tool_use", "id": tool_id, "name": name, "input": args}
+
+
+class _FakeApi:
+    """按顺序返回预设响应，并记录每次调用的 system prompt。"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.system_prompts = []
+
+    def __call__(self, messages, system_prompt):
+        self.system_prompts.append(system_prompt)
+        return self.responses[len(self.system_prompts) - 1]
+
+
+def _write_tasks(path, tasks):
+    path.write_text("".join(json.dumps(t) + "\n" for t in tasks), encoding="utf-8")
+    return str(path)
+
+
+def _read_records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.parametrize(
+    "line, message",
+    [
+        ('{"id": "a", "prompt": ', "invalid JSON"),
+        ('["not", "an", "object"]', "task must be a JSON object"),
+        ('{"prompt": "hi", "cwd": 42}', "cwd must be a string"),
+        ('{"prompt": ""}', "missing or empty 'prompt'"),
+        ('{"cwd": "/tmp"}', "missing or empty 'prompt'"),
+    ],
+)
+def test_parse_task_marks_invalid_lines(line, message):
+    task = _parse_task(line, 3)
+
+    assert message in task["invalid"]
+    assert task["id"] and task["cwd"]
+
+
+def test_parse_task_defaults_id_to_line_number(tmp_path):
+    task = _parse_task(json.dumps({"prompt": "hi", "cwd": str(tmp_path)}), 7)
+
+    assert task["id"] == "7"
+    assert task["cwd"] == str(tmp_path)
+    assert "invalid" not in task
+
+
+def test_invalid_task_recorded_as_error(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "call_api", _FakeApi())
+    tasks = tmp_path / "tasks.jsonl"
+    tasks.write_text('{"id": "bad", "prompt": \n', encoding="utf-8")
+    out = str(tmp_path / "out.jsonl")
+
+    assert run_batch(str(tasks), out) == 1
+
+    [record] = _read_records(out)
+    assert record["status"] == "error"
+    assert "invalid JSON" in record["error"]
+
+
+def test_bad_cwd_recorded_as_error(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "call_api", _FakeApi())
+    missing = str(tmp_path / "missing")
+    tasks = _write_tasks(tmp_path / "tasks.jsonl", [{"id": "a", "prompt": "hi", "cwd": missing}])
+    out = str(tmp_path / "out.jsonl")
+
+    assert run_batch(tasks, out) == 1
+
+    [record] = _read_records(out)
+    assert record["status"] == "error"
+    assert "cwd not found" in record["error"]
+
+
+def test_load_done_ids_skips_failed_and_truncated_lines(tmp_path):
+    path = tmp_path / "out.jsonl"
+    path.write_text(
+        json.dumps({"id": "a", "status": "ok"}) + "\n"
+        + json.dumps({"id": "b", "status": "error"}) + "\n"
+        + json.dumps({"id": "c", "status": "interrupted"}) + "\n"
+        + '{"id": "d", "status": "o',
+        encoding="utf-8",
+    )
+
+    assert _load_done_ids(str(path)) == {"a"}
+
+
+def test_load_done_ids_missing_file_or_stdout(tmp_path):
+    assert _load_done_ids(str(tmp_path / "missing.jsonl")) == set()
+    assert _load_done_ids("-") == set()
+
+
+def test_resume_skips_ok_ids(tmp_path, monkeypatch):
+    api = _FakeApi({"content": [{"type": "text", "text": "done"}]})
+    monkeypatch.setattr(batch, "call_api", api)
+    cwd = str(tmp_path)
+    tasks = _write_tasks(
+        tmp_path / "tasks.jsonl",
+        [{"id": "a", "prompt": "1", "cwd": cwd}, {"id": "b", "prompt": "2", "cwd": cwd}],
+    )
+    out = tmp_path / "out.jsonl"
+    out.write_text(
+        json.dumps({"id": "a", "status": "ok"}) + "\n"
+        + json.dumps({"id": "b", "status": "error"}) + "\n",
+        encoding="utf-8",
+    )
+
+    assert run_batch(tasks, str(out), resume=True) == 0
+
+    records = _read_records(str(out))
+    assert [r["id"] for r in records] == ["a", "b", "b"]
+    assert records[-1]["status"] == "ok"
+    assert len(api.system_prompts) == 1
+
+
+def test_task_cwd_reaches_system_prompt_and_bash(tmp_path, monkeypatch):
+    workdir = tmp_path / "repo"
+    workdir.mkdir()
+    api = _FakeApi(
+        {"content": [_tool_use("t1", "bash", {"cmd": "pwd"})]},
+        {"content": [{"type": "text", "text": "done"}]},
+    )
+    monkeypatch.setattr(batch, "call_api", api)
+    tasks = _write_tasks(tmp_path / "tasks.jsonl", [{"id": "a", "prompt": "hi", "cwd": str(workdir)}])
+    out = str(tmp_path / "out.jsonl")
+
+    assert run_batch(tasks, out) == 0
+
+    [record] = _read_records(out)
+    assert all(str(workdir) in prompt for prompt in api.system_prompts)
+    assert record["tool_trace"][0]["result"].strip() == str(workdir)
+    assert record["final_text"] == "done"
+
+
+def test_usage_summed_across_turns(tmp_path, monkeypatch):
+    api = _FakeApi(
+        {
+            "content": [_tool_use("t1", "bash", {"cmd": "true"})],
+            "usage": {"input_tokens": 10, "output_tokens": 3},
+        },
+        {
+            "content": [{"type": "text", "text": "done"}],
+            "usage": {"input_tokens": 25, "output_tokens": 4},
+        },
+    )
+    monkeypatch.setattr(batch, "call_api", api)
+    tasks = _write_tasks(tmp_path / "tasks.jsonl", [{"id": "a", "prompt": "hi", "cwd": str(tmp_path)}])
+    out = str(tmp_path / "out.jsonl")
+
+    assert run_batch(tasks, out) == 0
+
+    [record] = _read_records(out)
+    assert record["usage"] == {"input_tokens": 35, "output_tokens": 7}
+
+
+def test_cancelled_scope_records_task_as_interrupted(tmp_path, monkeypatch):
+    scope = CancelScope()
+    api = _FakeApi({"content": [_tool_use("t1", "bash", {"cmd": "sleep 20"})]})
+
+    def _cancel_then_call(messages, system_prompt):
+        scope.cancel()
+        return api(messages, system_prompt)
+
+    monkeypatch.setattr(batch, "call_api", _cancel_then_call)
+    task = _parse_task(json.dumps({"id": "a", "prompt": "hi", "cwd": str(tmp_path)}), 1)
+
+    record = batch._run_task(task, scope)
+
+    assert record["status"] == "interrupted"
+    assert record["tool_trace"] == []
+    assert len(api.system_prompts) == 1
@@ -0,0 +1,21 @@
+"""启动时延迟加载的回归测试。"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 这些模块只应在第一次 API 请求或工具调用时才导入
+LAZY_MODULES = ("subprocess", "urllib.request", "lib.tool_impl", "lib.workers", "multiprocessing")
+
+
+def test_import_agent_does_not_load_heavy_modules():
+    code = (
+        "import sys, lib.agent; "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT, check=True
+    )
+    assert result.stdout.strip() == ""
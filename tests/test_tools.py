@@ -0,0 +1,36 @@
+"""run_tool 截止时间与取消的测试。"""
+
+import time
+
+import pytest
+
+from lib import tools
+
+
+@pytest.fixture
+def bash_timeout(monkeypatch):
+    monkeypatch.setitem(tools.TOOL_TIMEOUTS, "bash", 1)
+
+
+def test_run_tool_returns_result(tmp_path):
+    assert tools.run_tool("bash", {"cmd": "echo hi"}, cwd=str(tmp_path), quiet=True) == "hi"
+
+
+def test_run_tool_bash_timeout_keeps_partial_output(bash_timeout):
+    started = time.monotonic()
+    result = tools.run_tool("bash", {"cmd": "echo start; sleep 30"}, quiet=True)
+
+    assert time.monotonic() - started < 5
+    assert result == "start\n(timed out after 1s)"
+
+
+def test_run_tool_bash_timeout_kills_process_group(bash_timeout, tmp_path):
+    marker = tmp_path / "marker"
+    tools.run_tool("bash", {"cmd": f"(sleep 2; touch {marker}) & sleep 30"}, quiet=True)
+
+    time.sleep(2.5)
+    assert not marker.exists()
+
+
+def test_run_tool_unknown_tool():
+    assert tools.run_tool("nope", {}).startswith("error:")
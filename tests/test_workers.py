@@ -0,0 +1,120 @@
+"""工作进程池的测试：崩溃与超时后的恢复、排队时间不计入截止时间。"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from lib import tools, workers
+
+# 以下函数作为工具实现，由工作进程按 "test_workers:函数" 引用导入
+
+
+def _pid(args):
+    return str(os.getpid())
+
+
+def _crash(args):
+    os._exit(3)
+
+
+def _spin(args):
+    while True:
+        pass
+
+
+def _nap(args):
+    time.sleep(args.get("seconds", 0.6))
+    return "napped"
+
+
+def _wc(args):
+    with open(tools.resolve_path(args["path"]), encoding="utf-8") as f:
+        return str(sum(1 for _ in f))
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """单进程的工作进程池，替换全局池。"""
+    pool = workers._WorkerPool(1)
+    pool.start()
+    monkeypatch.setattr(workers, "_pool", pool)
+    yield pool
+    while not pool._idle.empty():
+        proc, conn = pool._idle.get()
+        proc.kill()
+        conn.close()
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """隔离注册表，测试中注册的工具不影响其他测试。"""
+    monkeypatch.setattr(tools, "TOOLS", dict(tools.TOOLS))
+    monkeypatch.setattr(tools, "TOOL_TIMEOUTS", dict(tools.TOOL_TIMEOUTS))
+    monkeypatch.setattr(tools, "_PROCESS_TOOLS", set(tools._PROCESS_TOOLS))
+    monkeypatch.setattr(tools, "_SCHEMA", tools._SCHEMA)
+    for name in ("pid", "crash", "spin", "nap"):
+        tools.register_tool(name, name, {}, f"{__name__}:_{name}", timeout=1, process=True)
+
+
+def test_pool_replaces_crashed_worker(pool):
+    with pytest.raises(RuntimeError, match="crashed"):
+        pool.run(f"{__name__}:_crash", {}, None, True, tools._ToolCall())
+
+    assert pool.crashed == 1
+    assert pool.run(f"{__name__}:_pid", {}, None, True, tools._ToolCall()) != str(os.getpid())
+
+
+def test_run_tool_crash_reports_error(pool, registry):
+    assert tools.run_tool("crash", {}).startswith("error: tool worker crashed")
+    assert tools.run_tool("pid", {}).isdigit()
+
+
+def test_run_tool_timeout_replaces_worker(pool, registry):
+    started = time.monotonic()
+    assert tools.run_tool("spin", {}) == "error: timed out after 1s"
+    assert time.monotonic() - started < 5
+
+    assert tools.run_tool("pid", {}).isdigit()
+    assert pool.crashed == 0
+
+
+def test_queue_time_not_counted_against_deadline(pool, registry):
+    # 单个工作进程串行执行 3 次 0.6s 的调用，总耗时超过 1s 的截止时间
+    with ThreadPoolExecutor(3) as executor:
+        results = list(executor.map(lambda _: tools.run_tool("nap", {}), range(3)))
+
+    assert results == ["napped"] * 3
+
+
+def test_cancel_after_finish_keeps_worker(pool):
+    call = tools._ToolCall()
+    pid = pool.run(f"{__name__}:_pid", {}, None, True, call)
+
+    call.cancel()
+
+    assert pool.run(f"{__name__}:_pid", {}, None, True, tools._ToolCall()) == pid
+
+
+@pytest.mark.parametrize("process", [False, True])
+def test_plugin_resolve_path_uses_call_cwd(pool, registry, tmp_path, process):
+    (tmp_path / "f.txt").write_text("a\nb\n", encoding="utf-8")
+    tools.register_tool("wc", "wc", {"path": "string"}, f"{__name__}:_wc", process=process)
+
+    assert tools.run_tool("wc", {"path": "f.txt"}, cwd=str(tmp_path)) == "2"
+
+
+def test_stats_report_window_utilisation_and_peak_queue(pool, registry):
+    pool.stats()  # 开始新的统计窗口
+    with ThreadPoolExecutor(3) as executor:
+        list(executor.map(lambda _: tools.run_tool("nap", {}), range(3)))
+
+    stats = pool.stats()
+
+    assert stats["busy"] == 0 and stats["queued"] == 0
+    assert stats["calls"] == 3
+    assert stats["peak_queued"] >= 2
+    assert stats["utilisation"] > 0.5
+
+    assert pool.stats()["calls"] == 0  # 读取后重置窗口